@@ -0,0 +1,69 @@
+from typing import Any, Callable, Dict
+
+from benchmarks.common import bench
+from nincore import AttrDict
+
+
+def make_config(size: int) -> Dict[str, Any]:
+    """A config with `size` sections, each with a few scalar fields."""
+    return {
+        f'section{i}': {'lr': 1e-3, 'epochs': i, 'name': f'exp{i}', 'sub': {'a': i}}
+        for i in range(size)
+    }
+
+
+@bench('attrdict.construct')
+def construct(size: int) -> Callable[[], Any]:
+    config = make_config(size)
+    return lambda: AttrDict(config)
+
+
+@bench('attrdict.getattr')
+def getattr_(size: int) -> Callable[[], Any]:
+    d = AttrDict(make_config(size))
+    keys = list(d.keys())
+
+    def stmt() -> None:
+        for k in keys:
+            getattr(d, k).sub.a
+
+    return stmt
+
+
+@bench('attrdict.setattr')
+def setattr_(size: int) -> Callable[[], Any]:
+    d = AttrDict(make_config(size))
+    keys = list(d.keys())
+
+    def stmt() -> None:
+        for k in keys:
+            setattr(d, k, 1)
+
+    return stmt
+
+
+@bench('attrdict.fingerprint')
+def fingerprint(size: int) -> Callable[[], Any]:
+    d = AttrDict(make_config(size))
+    nodes = [d]
+    for n in nodes:
+        nodes += [v for v in n.values() if isinstance(v, AttrDict)]
+
+    def stmt() -> None:
+        for n in nodes:
+            n.__dict__.clear()
+        d.fingerprint()
+
+    return stmt
+
+
+@bench('attrdict.fingerprint_cached')
+def fingerprint_cached(size: int) -> Callable[[], Any]:
+    d = AttrDict(make_config(size))
+    keys = list(d.keys())
+
+    def stmt() -> None:
+        d[keys[0]] = d[keys[0]].copy()
+        d.fingerprint()
+
+    return stmt
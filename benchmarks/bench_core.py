@@ -0,0 +1,21 @@
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from benchmarks.common import bench
+from nincore import mgetattr, split_n
+
+
+@bench('core.mgetattr', sizes=(1, 10, 100))
+def mgetattr_(size: int) -> Callable[[], Any]:
+    o = leaf = SimpleNamespace()
+    for _ in range(size):
+        leaf.child = SimpleNamespace()
+        leaf = leaf.child
+    attr = '.'.join(['child'] * size)
+    return lambda: mgetattr(o, attr)
+
+
+@bench('alg.split_n', sizes=(100, 10_000, 1_000_000))
+def split_n_(size: int) -> Callable[[], Any]:
+    x = list(range(size))
+    return lambda: split_n(x, 32)
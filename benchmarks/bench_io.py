@@ -0,0 +1,42 @@
+import os
+import tempfile
+from functools import lru_cache
+from typing import Any, Callable
+
+from benchmarks.bench_attrdict import make_config
+from benchmarks.common import bench
+from nincore.io import load_json, load_pt, load_yaml, save_json, save_pt, save_yaml
+
+
+@lru_cache(maxsize=None)
+def _tmp_dir() -> tempfile.TemporaryDirectory:
+    # Created at the first use and removed at exit with its finalizer.
+    return tempfile.TemporaryDirectory(prefix='nincore-bench-')
+
+
+def _round_trip(
+    save: Callable[[Any, str], None], load: Callable[[str], Any], ext: str, size: int
+) -> Callable[[], Any]:
+    config = make_config(size)
+    file_dir = os.path.join(_tmp_dir().name, f'config{size}.{ext}')
+
+    def stmt() -> None:
+        save(config, file_dir)
+        load(file_dir)
+
+    return stmt
+
+
+@bench('io.json', sizes=(10, 100))
+def json_round_trip(size: int) -> Callable[[], Any]:
+    return _round_trip(save_json, load_json, 'json', size)
+
+
+@bench('io.yaml', sizes=(10, 100))
+def yaml_round_trip(size: int) -> Callable[[], Any]:
+    return _round_trip(save_yaml, load_yaml, 'yaml', size)
+
+
+@bench('io.pt', sizes=(10, 100))
+def pt_round_trip(size: int) -> Callable[[], Any]:
+    return _round_trip(save_pt, load_pt, 'pt', size)
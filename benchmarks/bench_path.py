@@ -0,0 +1,48 @@
+from typing import Any, Callable, Dict
+
+from benchmarks.bench_attrdict import make_config
+from benchmarks.common import bench
+from nincore import AttrDict
+
+
+def make_deep_config(size: int) -> Dict[str, Any]:
+    """A config nested `size` levels, each level with a few scalar fields."""
+    config: Dict[str, Any] = {}
+    node = config
+    for i in range(size):
+        node.update(lr=1e-3, epochs=i, name=f'exp{i}')
+        node = node.setdefault('sub', {})
+    return config
+
+
+CONFIGS = {'deep': make_deep_config, 'wide': make_config}
+
+
+for kind, make in CONFIGS.items():
+
+    @bench(f'path.flatten_{kind}', sizes=(10, 100))
+    def flatten(size: int, make: Callable = make) -> Callable[[], Any]:
+        d = AttrDict(make(size))
+        return d.flatten
+
+    @bench(f'path.unflatten_{kind}', sizes=(10, 100))
+    def unflatten(size: int, make: Callable = make) -> Callable[[], Any]:
+        flat = AttrDict(make(size)).flatten()
+        return lambda: AttrDict.unflatten(flat)
+
+    @bench(f'path.update_paths_{kind}', sizes=(10, 100))
+    def update_paths(size: int, make: Callable = make) -> Callable[[], Any]:
+        d = AttrDict(make(size))
+        flat = d.flatten()
+        return lambda: d.update_paths(flat)
+
+    @bench(f'path.get_path_{kind}', sizes=(10, 100))
+    def get_path(size: int, make: Callable = make) -> Callable[[], Any]:
+        d = AttrDict(make(size))
+        paths = list(d.flatten())
+
+        def stmt() -> None:
+            for p in paths:
+                d.get_path(p)
+
+        return stmt
@@ -0,0 +1,90 @@
+"""Registry and runner of benchmarks based on `timeit`."""
+
+import platform
+import statistics
+import timeit
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence
+
+__all__ = ['bench', 'run_benches', 'compare', 'BENCHES']
+
+
+class Bench(NamedTuple):
+    name: str
+    fn: Callable[[int], Callable[[], Any]]
+    sizes: Sequence[int]
+
+
+BENCHES: List[Bench] = []
+
+
+def bench(name: str, sizes: Sequence[int] = (10, 100, 1_000)) -> Callable:
+    """Register a benchmark. `fn(size)` prepares a payload and returns a statement.
+
+    Example:
+    >>> @bench('alg.split_n')
+    ... def split(size):
+    ...     x = list(range(size))
+    ...     return lambda: split_n(x, 3)
+    """
+
+    def register(fn: Callable[[int], Callable[[], Any]]) -> Callable:
+        BENCHES.append(Bench(name, fn, sizes))
+        return fn
+
+    return register
+
+
+def run_bench(stmt: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, Any]:
+    timer = timeit.Timer(stmt)
+    number, _ = timer.autorange()
+    # `autorange` targets 0.2 seconds per repeat, scale for `min_time`.
+    number = max(int(number * min_time / 0.2), 1)
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {'best': min(times), 'median': statistics.median(times), 'number': number}
+
+
+def run_benches(
+    pattern: str = '',
+    sizes: Sequence[int] | None = None,
+    repeat: int = 5,
+    min_time: float = 0.2,
+) -> Dict[str, Any]:
+    """Run registered benchmarks with names containing `pattern`.
+
+    Returns:
+        a json-able `dict` with results in seconds per call keyed by `name[size]`.
+    """
+    results = {}
+    for b in BENCHES:
+        if pattern not in b.name:
+            continue
+        for size in sizes or b.sizes:
+            key = f'{b.name}[{size}]'
+            results[key] = run_bench(b.fn(size), repeat, min_time)
+            print(f'{key:<40} {results[key]["best"] * 1e6:>14,.3f} us')
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.1
+) -> List[str]:
+    """Compare `best` times with a baseline.
+
+    Returns:
+        names of benchmarks slower than `baseline` by more than `threshold` ratio.
+    """
+    regressed = []
+    for key, r in results['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        ratio = r['best'] / base['best']
+        status = 'REGRESSED' if ratio > 1.0 + threshold else 'ok'
+        print(f'{key:<40} {ratio:>8.3f}x {status}')
+        if status == 'REGRESSED':
+            regressed.append(key)
+    return regressed
@@ -0,0 +1,52 @@
+"""Run benchmarks and compare with a baseline.
+
+Example:
+>>> python -m benchmarks.run --save-baseline
+>>> python -m benchmarks.run --out results.json --threshold 0.2
+"""
+
+import argparse
+import importlib
+import os
+import pkgutil
+import sys
+
+from benchmarks.common import compare, run_benches
+from nincore.io import load_json, save_json
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', '--pattern', default='', help='run names with this.')
+    parser.add_argument('--sizes', type=int, nargs='+', help='override sizes.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2)
+    parser.add_argument('--out', help='save results to this json file.')
+    parser.add_argument('--baseline', default=BASELINE_DIR)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    for m in pkgutil.iter_modules([os.path.dirname(__file__)]):
+        if m.name.startswith('bench_'):
+            importlib.import_module(f'benchmarks.{m.name}')
+
+    results = run_benches(args.pattern, args.sizes, args.repeat, args.min_time)
+    if args.out:
+        save_json(results, args.out)
+    if args.save_baseline:
+        save_json(results, args.baseline)
+        return 0
+    if not os.path.isfile(args.baseline):
+        print(f'No baseline at `{args.baseline}`, skip comparison.')
+        return 0
+
+    baseline = load_json(args.baseline)
+    regressed = compare(results, baseline, args.threshold)
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
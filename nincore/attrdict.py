@@ -1,14 +1,74 @@
+import hashlib
 import json
+import mmap
 import os
 from collections import OrderedDict
-from typing import Any, Dict
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Tuple
 
 import numpy as np
 import yaml
 
 from nincore.io import save_pt
 
-__all__ = ['AttrDict', 'DefAttrDict']
+__all__ = ['AttrDict', 'DefAttrDict', 'FrozenAttrDict']
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=4_096)
+def _split_path(path: str, sep: str) -> Tuple[str, ...]:
+    """Cached index of a dotted path to its keys, sweeps access the same paths."""
+    return tuple(path.split(sep))
+
+
+def _resolve_key(node: Any, k: str) -> Any:
+    """A key `k` of `node`, digits are also indices of lists and `int` keys."""
+    if isinstance(node, (list, tuple)):
+        return int(k)
+    if k not in node and k.isdigit() and int(k) in node:
+        return int(k)
+    return k
+
+
+def _make_child(node: Any, k: str, cls: type) -> Any:
+    """Get a child node of `node`, a missing or None child is created as `cls`."""
+    k = _resolve_key(node, k)
+    child = node[k] if isinstance(node, (list, tuple)) else node.get(k)
+    if child is None:
+        child = node[k] = cls()
+    elif not isinstance(child, (dict, list, tuple)):
+        raise TypeError(f'`{k}` is not a mapping or a sequence. Your: {child!r}.')
+    return child
+
+
+def _get_parent(parents: Dict[str, Any], parent_path: str, sep: str, cls: type) -> Any:
+    """Get a node of `parent_path` from looked up `parents` or create it.
+
+    Only walks from the nearest looked up ancestor, so adding paths of a deep
+    config is linear instead of quadratic with its depth.
+    """
+    missing = []
+    while parent_path not in parents:
+        missing.append(parent_path)
+        parent_path = parent_path.rpartition(sep)[0]
+    node = parents[parent_path]
+    for path in reversed(missing):
+        node = parents[path] = _make_child(node, path.rpartition(sep)[2], cls)
+    return node
+
+
+def _drop_parents(parents: Dict[str, Any], path: str, sep: str) -> None:
+    """Drop looked up `path` and its descendants before its node is replaced.
+
+    `_get_parent` caches all ancestors of a path, so nothing under `path` is cached
+    if `path` itself is not.
+    """
+    if path in parents:
+        prefix = path + sep
+        for p in [p for p in parents if p == path or p.startswith(prefix)]:
+            del parents[p]
 
 
 class AttrDict(OrderedDict):
@@ -36,6 +96,10 @@ class AttrDict(OrderedDict):
                     if isinstance(value, (dict, OrderedDict, AttrDict)):
                         self[k][idx] = AttrDict(v[idx])
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Private caches in `__dict__` are not a part of the content.
+        return self.__class__, (), None, None, iter(self.items())
+
     def __setattr__(self, key: str, value: Any) -> None:
         self.__setitem__(key, value)
 
@@ -78,6 +142,158 @@ class AttrDict(OrderedDict):
         s += ' ' * (indent - 2) + '},'
         return s
 
+    def fingerprint(self, sort_keys: bool = False) -> str:
+        """Stable content hash of this `AttrDict` as a hex string.
+
+        The digest is the same across processes. `np.ndarray` is hashed from its
+        buffer with its dtype and shape. Digests of nested `AttrDict` are cached, so
+        re-fingerprinting after setting a few keys only rehashes the changed nodes.
+        A cached digest is only reused for a node with the same key and value
+        objects, all immutable, for example, scalars, tuples and read-only arrays.
+        Nodes with lists, dicts or writable arrays are rehashed on every call.
+        Values should be scalars, strings, bytes, arrays, sets, sequences or mappings,
+        others raise `TypeError` as their `repr` might differ across processes.
+
+        Args:
+            sort_keys: if True, ignore the order of keys.
+
+        Example:
+        >>> d0, d1 = AttrDict(a=1, b=2), AttrDict(b=2, a=1)
+        >>> d0.fingerprint() == d1.fingerprint()
+        False
+        >>> d0.fingerprint(sort_keys=True) == d1.fingerprint(sort_keys=True)
+        True
+        """
+        return self._fingerprint(sort_keys).hex()
+
+    def _fingerprint(self, sort_keys: bool) -> bytes:
+        # Validate a cache by identities of items instead of hooking `__setitem__`,
+        # which slows down every construction and assignment.
+        cache = self.__dict__.setdefault('_fp_cache', {})
+        if sort_keys in cache:
+            items, children, digest = cache[sort_keys]
+            if (
+                len(items) == len(self)
+                and all(
+                    k0 is k1 and v0 is v1
+                    for (k0, v0), (k1, v1) in zip(items, self.items())
+                )
+                and all(c._fingerprint(sort_keys) == d for c, d in children)
+            ):
+                return digest
+
+        h = hashlib.blake2b(digest_size=16)
+        children: List[Tuple[AttrDict, bytes]] = []
+        _hash_mapping(h, self, sort_keys, children)
+        digest = h.digest()
+        # Values that can change in place might differ at the next call with the
+        # same identities, a cache is only valid without them.
+        if all(_is_immutable(v) for v in self.values()):
+            cache[sort_keys] = (tuple(self.items()), tuple(children), digest)
+        else:
+            cache.pop(sort_keys, None)
+        return digest
+
+    def get_path(self, path: str, default: Any = _MISSING, sep: str = '.') -> Any:
+        """Get a value with a dotted path, for example, `d.get_path('a.b.0')`.
+
+        Raise `KeyError` if the path does not exist and `default` is not given.
+        """
+        node: Any = self
+        try:
+            for k in _split_path(path, sep):
+                if isinstance(node, dict):
+                    # `get` avoids `__missing__` of `DefAttrDict`.
+                    child = node.get(k, _MISSING)
+                    if child is _MISSING and k.isdigit():
+                        child = node.get(int(k), _MISSING)
+                    if child is _MISSING:
+                        raise KeyError(path)
+                    node = child
+                else:
+                    node = node[int(k)]
+        except (KeyError, IndexError, ValueError, TypeError):
+            if default is _MISSING:
+                raise KeyError(path) from None
+            return default
+        return node
+
+    def set_path(self, path: str, value: Any, sep: str = '.') -> None:
+        """Set a value with a dotted path, missing nodes are created as `AttrDict`.
+
+        Raises `TypeError` if a node on the path is a scalar instead of overwriting it.
+        """
+        self.update_paths({path: value}, sep)
+
+    def update_paths(self, updates: Dict[str, Any], sep: str = '.') -> None:
+        """Set values of many dotted paths in one pass.
+
+        Parent nodes are looked up once per call and shared between paths with the
+        same parent, for example, `a.b.c` and `a.b.d`.
+
+        Example:
+        >>> d = AttrDict(opt={'lr': 0.1})
+        >>> d.update_paths({'opt.lr': 0.01, 'opt.momentum': 0.9, 'model.depth': 18})
+        >>> d.model.depth
+        18
+        """
+        cls = self.__class__
+        parents: Dict[str, Any] = {'': self}
+        for path, value in updates.items():
+            parent_path, _, k = path.rpartition(sep)
+            parent = _get_parent(parents, parent_path, sep, cls)
+            k = _resolve_key(parent, k)
+            if isinstance(value, Mapping) and not isinstance(value, AttrDict):
+                value = cls(value)
+            _drop_parents(parents, path, sep)
+            parent[k] = value
+
+    def flatten(self, sep: str = '.') -> Dict[str, Any]:
+        """Flatten nested mappings to a `dict` with dotted path keys.
+
+        Lists and empty mappings are kept as leaves. Iterative, no recursion limit.
+
+        Example:
+        >>> AttrDict(a=1, b={'c': 2, 'd': {}}).flatten()
+        {'a': 1, 'b.c': 2, 'b.d': {}}
+        """
+        flat = {}
+        stack = [('', iter(self.items()))]
+        while stack:
+            prefix, items = stack[-1]
+            for k, v in items:
+                key = f'{prefix}{k}'
+                if isinstance(v, dict) and v:
+                    stack.append((key + sep, iter(v.items())))
+                    break
+                flat[key] = v
+            else:
+                stack.pop()
+        return flat
+
+    @classmethod
+    def unflatten(cls, flat: Dict[str, Any], sep: str = '.') -> 'AttrDict':
+        """Inverse of `flatten`, all keys are `str`.
+
+        Example:
+        >>> AttrDict.unflatten({'a': 1, 'b.c': 2}).b.c
+        2
+        """
+        root = cls()
+        parents: Dict[str, Any] = {'': root}
+        for path, value in flat.items():
+            parent_path, _, k = path.rpartition(sep)
+            parent = _get_parent(parents, parent_path, sep, cls)
+            if isinstance(value, Mapping) and not isinstance(value, AttrDict):
+                value = cls(value)
+            _drop_parents(parents, path, sep)
+            parent[k] = value
+        return root
+
+    def freeze(self) -> 'FrozenAttrDict':
+        """Converts to a hashable `FrozenAttrDict`, writable arrays are copied."""
+        return FrozenAttrDict(self)
+
     @classmethod
     def from_args(cls, args: Any) -> None:
         """Converts `argparse.Namespace` to `AttrDict`."""
@@ -108,6 +324,98 @@ class AttrDict(OrderedDict):
         self._if_not_exist_makedirs(pt_dir)
         save_pt(self, pt_dir)
 
+    def to_dir(self, dir_: str) -> None:
+        """Save as a directory with `meta.json` and a `.npy` file for each array.
+
+        `meta.json` keeps the order of keys, other fields of flattened paths and
+        file names of arrays. Files are named by numbers, so any key is safe as a
+        path. Arrays are loaded lazily with `from_dir` and can be replaced one by
+        one with `update_dir_array` without rewriting the others. Raise `TypeError`
+        for other values that are not json serializable, for example, arrays in
+        lists.
+
+        Example:
+        >>> AttrDict(lr=0.1, w={'fc': np.zeros((1024, 1024))}).to_dir('./exp')
+        >>> os.listdir('./exp')
+        ['meta.json', '0.npy']
+        """
+        assert isinstance(dir_, str), f'Should be `str`, Your `{type(dir_)}`.'
+        dir_ = os.path.expanduser(dir_)
+
+        flat = self.flatten()
+        fields, arrays = {}, {}
+        for key, value in flat.items():
+            if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+                arrays[key] = f'{len(arrays)}.npy'
+            else:
+                fields[key] = value
+        meta = {'keys': list(flat), 'fields': fields, 'arrays': arrays}
+        # Serialize before writing arrays to raise without a partial directory.
+        meta_str = _dump_meta(meta)
+
+        os.makedirs(dir_, exist_ok=True)
+        for key, name in arrays.items():
+            _save_npy(os.path.join(dir_, name), flat[key])
+        _save_text(os.path.join(dir_, 'meta.json'), meta_str)
+
+    @classmethod
+    def from_dir(cls, dir_: str, mmap_mode: str | None = 'r') -> 'AttrDict':
+        """Load a directory from `to_dir`, arrays are memory-mapped with `mmap_mode`.
+
+        With `mmap_mode='r'`, arrays are read lazily without copying. With
+        `mmap_mode='r+'`, in-place modifications of arrays are written to files.
+        """
+        assert isinstance(dir_, str), f'Should be `str`, Your `{type(dir_)}`.'
+        dir_ = os.path.expanduser(dir_)
+        with open(os.path.join(dir_, 'meta.json')) as f:
+            meta = json.load(f)
+
+        fields, arrays = meta['fields'], meta['arrays']
+        flat = {}
+        for key in meta['keys']:
+            if key in fields:
+                flat[key] = fields[key]
+            else:
+                flat[key] = np.load(os.path.join(dir_, arrays[key]), mmap_mode)
+        return cls.unflatten(flat)
+
+    @staticmethod
+    def update_dir_array(dir_: str, key: str, value: np.ndarray) -> None:
+        """Replace or add an array of `key` in a directory from `to_dir`.
+
+        Only this array and, if `key` is new, `meta.json` are written. The array is
+        written to a temporary file and renamed, so readers that memory-map the old
+        file are not affected. Raises `ValueError` if `key` is a parent or a child of
+        an existing key, which would drop or break its fields.
+        """
+        assert isinstance(
+            value, np.ndarray
+        ), f'Should be `np.ndarray`, Your `{type(value)}`.'
+        dir_ = os.path.expanduser(dir_)
+        meta_dir = os.path.join(dir_, 'meta.json')
+        with open(meta_dir) as f:
+            meta = json.load(f)
+
+        for k in meta['keys']:
+            if k.startswith(key + '.') or key.startswith(k + '.'):
+                raise ValueError(f'`{key}` overlaps an existing key `{k}`.')
+
+        arrays = meta['arrays']
+        name = arrays.get(key)
+        if name is None:
+            names, i = set(arrays.values()), len(arrays)
+            while f'{i}.npy' in names:
+                i += 1
+            name = f'{i}.npy'
+        _save_npy(os.path.join(dir_, name), value)
+
+        if key not in arrays:
+            if key not in meta['keys']:
+                meta['keys'].append(key)
+            meta['fields'].pop(key, None)
+            arrays[key] = name
+            _save_text(meta_dir, _dump_meta(meta))
+
     def _if_not_exist_makedirs(self, dirname: str) -> None:
         dirname = os.path.dirname(dirname)
         if dirname == '' or dirname == '.':
@@ -127,6 +435,287 @@ class AttrDict(OrderedDict):
                 self[k] = v.tolist()
 
 
+def _save_npy(npy_dir: str, value: np.ndarray) -> None:
+    # Write to a temporary file then rename, memory-mapped old files stay valid.
+    tmp_dir = f'{npy_dir}.tmp'
+    with open(tmp_dir, 'wb') as f:
+        np.save(f, value)
+    os.replace(tmp_dir, npy_dir)
+
+
+def _dump_meta(meta: Dict[str, Any]) -> str:
+    return json.dumps(meta, indent=4, default=_to_json_scalar)
+
+
+def _save_text(text_dir: str, text: str) -> None:
+    tmp_dir = f'{text_dir}.tmp'
+    with open(tmp_dir, 'w') as f:
+        f.write(text)
+    os.replace(tmp_dir, text_dir)
+
+
+def _to_json_scalar(value: Any) -> Any:
+    """Converts numpy scalars, raise for other not serializable values."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(
+        f'`{type(value)}` is not json serializable, arrays are only saved as `.npy` '
+        'if they are values of mappings.'
+    )
+
+
+def _is_readonly_array(v: np.ndarray) -> bool:
+    """Whether `v` and all arrays of its `base` chain are read-only."""
+    while isinstance(v, np.ndarray):
+        if v.flags.writeable:
+            return False
+        v = v.base
+    # A buffer that might be written from outside, for example, `bytearray`.
+    return v is None or isinstance(v, (bytes, mmap.mmap))
+
+
+def _is_immutable(v: Any) -> bool:
+    """Whether `v` can not be changed in place. `AttrDict` is validated by itself."""
+    if isinstance(v, (AttrDict, FrozenAttrDict, str, bytes, int, float, complex)):
+        return True
+    elif v is None or isinstance(v, np.generic):
+        return True
+    elif isinstance(v, tuple):
+        return all(_is_immutable(i) for i in v)
+    elif isinstance(v, np.ndarray):
+        return not v.dtype.hasobject and _is_readonly_array(v)
+    return False
+
+
+def _hash_mapping(
+    h: Any, d: Dict[Any, Any], sort_keys: bool, children: List[Tuple[AttrDict, bytes]]
+) -> None:
+    if sort_keys:
+        # Sort by encodings, `repr` of some keys might differ across processes.
+        items = sorted(
+            d.items(), key=lambda kv: _encode_value(kv[0], sort_keys, children)
+        )
+    else:
+        items = d.items()
+    h.update(b'{%d' % len(d))
+    for k, v in items:
+        _hash_value(h, k, sort_keys, children)
+        _hash_value(h, v, sort_keys, children)
+    h.update(b'}')
+
+
+def _encode_value(
+    v: Any, sort_keys: bool, children: List[Tuple[AttrDict, bytes]]
+) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    _hash_value(h, v, sort_keys, children)
+    return h.digest()
+
+
+def _hash_value(
+    h: Any, v: Any, sort_keys: bool, children: List[Tuple[AttrDict, bytes]]
+) -> None:
+    """Update `h` with a type-tagged and unambiguous encoding of `v`."""
+    if isinstance(v, AttrDict):
+        digest = v._fingerprint(sort_keys)
+        children.append((v, digest))
+        h.update(b'A')
+        h.update(digest)
+    elif isinstance(v, FrozenAttrDict):
+        h.update(b'A')
+        h.update(v._fingerprint(sort_keys))
+    elif isinstance(v, dict):
+        _hash_mapping(h, v, sort_keys, children)
+    elif isinstance(v, (list, tuple)):
+        # Same tag for `list` and `tuple`, `FrozenAttrDict` converts lists to tuples.
+        h.update(b'seq%d[' % len(v))
+        for i in v:
+            _hash_value(h, i, sort_keys, children)
+        h.update(b']')
+    elif isinstance(v, np.ndarray):
+        h.update(f'ndarray{v.dtype.descr}{v.shape}'.encode())
+        if v.dtype.hasobject:
+            for i in v.flat:
+                _hash_value(h, i, sort_keys, children)
+        else:
+            # Hash from the buffer, copy only if it is not C-contiguous.
+            h.update(np.ascontiguousarray(v).data)
+    elif isinstance(v, np.generic):
+        h.update(f'{v.dtype.descr}'.encode())
+        h.update(v.tobytes())
+    elif isinstance(v, str):
+        e = v.encode()
+        h.update(b'str%d:' % len(e))
+        h.update(e)
+    elif isinstance(v, bytes):
+        h.update(b'bytes%d:' % len(v))
+        h.update(v)
+    elif isinstance(v, (set, frozenset)):
+        # Iteration order of a set depends on `PYTHONHASHSEED`, sort its elements.
+        h.update(b'set%d{' % len(v))
+        for e in sorted(_encode_value(i, sort_keys, children) for i in v):
+            h.update(e)
+        h.update(b'}')
+    elif v is None or isinstance(v, (bool, int, float, complex)):
+        # `repr` of these types is stable across processes.
+        r = repr(v).encode()
+        h.update(b'%s%d:' % (type(v).__qualname__.encode(), len(r)))
+        h.update(r)
+    else:
+        raise TypeError(
+            f'`{type(v)}` is not supported by `fingerprint`, its `repr` might '
+            'differ across processes.'
+        )
+
+
+def _freeze(v: Any) -> Any:
+    if isinstance(v, FrozenAttrDict):
+        return v
+    elif isinstance(v, Mapping):
+        return FrozenAttrDict(v)
+    elif isinstance(v, (list, tuple)):
+        return tuple(_freeze(i) for i in v)
+    elif isinstance(v, np.ndarray) and not _is_readonly_array(v):
+        # The caller can still write to its buffer, copy once then share the copy.
+        v = v.copy()
+        v.flags.writeable = False
+    return v
+
+
+def _thaw(v: Any) -> Any:
+    if isinstance(v, FrozenAttrDict):
+        return v.thaw()
+    elif isinstance(v, tuple):
+        return [_thaw(i) for i in v]
+    elif isinstance(v, np.ndarray):
+        return v.copy()
+    return v
+
+
+class FrozenAttrDict(Mapping):
+    """Immutable and hashable `AttrDict` that is safe to share between threads.
+
+    Nested mappings are converted to `FrozenAttrDict`, lists to tuples, and arrays
+    to read-only arrays. Arrays are copied once unless they and their bases are
+    already read-only, then they are shared without copying. The hash is computed from the content with
+    `fingerprint(sort_keys=True)` once and cached. `with_updates` reuses unchanged
+    sub-trees, so many variants of a config share most of their memory.
+
+    Example:
+    >>> base = AttrDict(model={'depth': 18}, opt={'lr': 0.1}).freeze()
+    >>> cfg = base.with_updates(opt__lr=0.01)
+    >>> cfg.opt.lr, cfg.model is base.model
+    (0.01, True)
+    >>> {cfg: 'result'}[base.with_updates(opt__lr=0.01)]
+    'result'
+    """
+
+    __slots__ = ('_d', '_fp_cache', '_hash')
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        d = {k: _freeze(v) for k, v in dict(*args, **kwargs).items()}
+        object.__setattr__(self, '_d', d)
+        object.__setattr__(self, '_fp_cache', {})
+        object.__setattr__(self, '_hash', None)
+
+    @classmethod
+    def _from_frozen(cls, d: Dict[Any, Any]) -> 'FrozenAttrDict':
+        """Build from already frozen values without converting them again."""
+        self = cls.__new__(cls)
+        object.__setattr__(self, '_d', d)
+        object.__setattr__(self, '_fp_cache', {})
+        object.__setattr__(self, '_hash', None)
+        return self
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._d[key]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._d)
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._d
+
+    def __getattr__(self, key: str) -> Any:
+        try:
+            return self._d[key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise TypeError('`FrozenAttrDict` does not support assignment.')
+
+    def __delattr__(self, key: str) -> None:
+        raise TypeError('`FrozenAttrDict` does not support deletion.')
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return self.__class__, (self._d,)
+
+    def __repr__(self) -> str:
+        return f'FrozenAttrDict({self._d!r})'
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            digest = self._fingerprint(True)
+            object.__setattr__(self, '_hash', int.from_bytes(digest[:8], 'little'))
+        return self._hash
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, FrozenAttrDict):
+            return self is other or self._fingerprint(True) == other._fingerprint(True)
+        elif isinstance(other, Mapping):
+            return self == FrozenAttrDict(other)
+        return NotImplemented
+
+    def fingerprint(self, sort_keys: bool = False) -> str:
+        """Stable content hash, same as `AttrDict.fingerprint` of `thaw()`."""
+        return self._fingerprint(sort_keys).hex()
+
+    def _fingerprint(self, sort_keys: bool) -> bytes:
+        # Immutable, a cache is always valid. Racing threads compute the same digest.
+        digest = self._fp_cache.get(sort_keys)
+        if digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            _hash_mapping(h, self._d, sort_keys, [])
+            digest = self._fp_cache[sort_keys] = h.digest()
+        return digest
+
+    def thaw(self) -> AttrDict:
+        """Converts to a mutable `AttrDict`, arrays are copied to be writable."""
+        return AttrDict({k: _thaw(v) for k, v in self._d.items()})
+
+    def with_updates(self, **kwargs: Any) -> 'FrozenAttrDict':
+        """Return a new `FrozenAttrDict` with updated values.
+
+        Nested keys are separated with `__`, for example, `a__b=1` sets `d.a.b`.
+        Missing nodes are created. Only nodes on updated paths are rebuilt, others
+        are shared with `self`.
+        """
+        updates = [(k.split('__'), v) for k, v in kwargs.items()]
+        return self._with_updates(updates)
+
+    def _with_updates(self, updates: List[Tuple[List[str], Any]]) -> 'FrozenAttrDict':
+        d = dict(self._d)
+        groups: Dict[str, List[Tuple[List[str], Any]]] = {}
+        for path, v in updates:
+            if len(path) == 1:
+                d[path[0]] = _freeze(v)
+            else:
+                groups.setdefault(path[0], []).append((path[1:], v))
+        for k, sub in groups.items():
+            child = d.get(k)
+            if not isinstance(child, FrozenAttrDict):
+                child = _EMPTY_FROZEN
+            d[k] = child._with_updates(sub)
+        return FrozenAttrDict._from_frozen(d)
+
+
+_EMPTY_FROZEN = FrozenAttrDict()
+
+
 class DefAttrDict(AttrDict):
     """Default (with None) Attributed OrderedDict.
 
@@ -1,9 +1,12 @@
 import json
+import math
 import os
 import pickle
 import re
-from typing import Any, Dict
+from io import BytesIO
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
 
+import numpy as np
 import yaml
 
 __all__ = [
@@ -13,6 +16,8 @@ __all__ = [
     'save_yaml',
     'load_pt',
     'save_pt',
+    'save_trace_event',
+    'ResultStore',
 ]
 
 
@@ -30,7 +35,8 @@ def save_json(dict_: Dict[str, Any], json_dir: str, indent: int = 4) -> None:
     assert isinstance(json_dir, str), f'`json_dir` is not `str`, Your: {type(json_dir)}'
     json_dir = os.path.expanduser(json_dir)
     dirname = os.path.dirname(json_dir)
-    os.makedirs(dirname, exist_ok=True)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
     with open(json_dir, 'w') as f:
         # Avoid objects which can not be serializable.
         json.dump(dict_, f, indent=indent, default=lambda _: '<not serializable>')
@@ -97,6 +103,259 @@ def save_pt(obj: Any, pt_dir: str) -> None:
         pickle.dump(obj, p, protocol=pickle.HIGHEST_PROTOCOL)
 
 
+def save_trace_event(events: List[Dict[str, Any]], json_dir: str) -> None:
+    """Save Chrome `trace_event` events as a json file for Perfetto or chrome://tracing.
+
+    Example:
+    >>> events = [{'name': 'a', 'ph': 'B', 'ts': 0, 'pid': 0, 'tid': 0}]
+    >>> save_trace_event(events, './trace.json')
+    """
+    assert isinstance(json_dir, str), f'`json_dir` is not `str`, Your: {type(json_dir)}'
+    json_dir = os.path.expanduser(json_dir)
+    dirname = os.path.dirname(json_dir)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(json_dir, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+_SCALAR_TYPES = (bool, int, float, str, type(None), np.bool_, np.integer, np.floating)
+_OPS = {'<': '<', '<=': '<=', '>': '>', '>=': '>=', '=': '=', '==': '=', '!=': '!='}
+
+
+def _to_field(value: Any) -> Tuple[Any, str | None]:
+    """Converts a scalar to a SQLite value and a type tag SQLite can not keep."""
+    value = value.item() if isinstance(value, np.generic) else value
+    if isinstance(value, bool):
+        return value, 'bool'
+    elif isinstance(value, float) and math.isnan(value):
+        # SQLite stores NaN as NULL.
+        return None, 'nan'
+    return value, None
+
+
+def _is_field(value: Any) -> bool:
+    """Whether `value` is a scalar SQLite can keep, it only has 64-bit integers."""
+    if isinstance(value, (int, np.integer)):
+        return -(1 << 63) <= value < 1 << 63
+    return isinstance(value, _SCALAR_TYPES)
+
+
+def _from_field(value: Any, kind: str | None) -> Any:
+    if kind == 'bool':
+        return bool(value)
+    elif kind == 'nan':
+        return math.nan
+    return value
+
+
+class ResultStore:
+    """Local store of experiment results indexed with SQLite.
+
+    Records, for example, `AttrDict`, are flattened to dotted paths. Scalar fields
+    are indexed in a key-value table, so filter queries do not load full records.
+    `np.ndarray` fields are saved as `.npy` blobs or, if larger than
+    `max_blob_bytes`, as `.npy` files referred by the database. Other fields, for
+    example, lists, are pickled.
+
+    Args:
+        db_dir: a location of the SQLite database file.
+        max_blob_bytes: arrays larger than this are saved as files.
+        wal: use write-ahead logging for concurrent readers while writing.
+
+    Example:
+    >>> with ResultStore('./results.db') as store:
+    ...     store.add(AttrDict(opt={'lr': 1e-4}, acc=0.95, pred=np.zeros(10)))
+    ...     ids = store.find(('opt.lr', '<', 1e-3), ('acc', '>', 0.9))
+    ...     store.fields(ids[0], ['acc'])
+    {'acc': 0.95}
+    """
+
+    def __init__(
+        self, db_dir: str, max_blob_bytes: int = 1 << 20, wal: bool = True
+    ) -> None:
+        assert isinstance(db_dir, str), f'`db_dir` is not `str`, Your: {type(db_dir)}'
+        self.db_dir = os.path.expanduser(db_dir)
+        self.array_dir = self.db_dir + '.arrays'
+        self.max_blob_bytes = max_blob_bytes
+        dirname = os.path.dirname(self.db_dir)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        # Imported here, `sqlite3` is slow to import and only needed by this class.
+        import sqlite3
+
+        self.conn = sqlite3.connect(self.db_dir)
+        if wal:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY);
+                CREATE TABLE IF NOT EXISTS fields (
+                    run_id INTEGER, pos INTEGER, key TEXT, value, kind TEXT
+                );
+                CREATE INDEX IF NOT EXISTS fields_key_value ON fields (key, value);
+                CREATE INDEX IF NOT EXISTS fields_run_id ON fields (run_id);
+                CREATE TABLE IF NOT EXISTS blobs (
+                    run_id INTEGER, pos INTEGER, key TEXT,
+                    kind TEXT, data BLOB, path TEXT
+                );
+                CREATE INDEX IF NOT EXISTS blobs_run_id ON blobs (run_id);
+                """
+            )
+
+    def __enter__(self) -> 'ResultStore':
+        return self
+
+    def __exit__(self, *_: Any, **__: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+
+    def add(self, record: Dict[str, Any]) -> int:
+        """Add a record and return its run id."""
+        return self.add_many([record])[0]
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> List[int]:
+        """Add records in one transaction and return their run ids."""
+        run_ids, fields, blobs, written = [], [], [], []
+        try:
+            with self.conn:
+                self._add_many(records, run_ids, fields, blobs, written)
+        except BaseException:
+            # Rows are rolled back, remove array files of them.
+            for path in written:
+                os.remove(path)
+            raise
+        return run_ids
+
+    def _add_many(
+        self,
+        records: Iterable[Dict[str, Any]],
+        run_ids: List[int],
+        fields: List[Tuple[Any, ...]],
+        blobs: List[Tuple[Any, ...]],
+        written: List[str],
+    ) -> None:
+        # `nincore.attrdict` imports this module, import it lazily.
+        from nincore.attrdict import AttrDict
+
+        for record in records:
+            if not isinstance(record, AttrDict):
+                record = AttrDict(record)
+            run_id = self.conn.execute('INSERT INTO runs DEFAULT VALUES').lastrowid
+            run_ids.append(run_id)
+            # `pos` keeps the order of keys between two tables.
+            for pos, (key, value) in enumerate(record.flatten().items()):
+                if _is_field(value):
+                    fields.append((run_id, pos, key, *_to_field(value)))
+                else:
+                    blob = self._to_blob(run_id, pos, value, written)
+                    blobs.append((run_id, pos, key, *blob))
+        self.conn.executemany('INSERT INTO fields VALUES (?, ?, ?, ?, ?)', fields)
+        self.conn.executemany('INSERT INTO blobs VALUES (?, ?, ?, ?, ?, ?)', blobs)
+
+    def _to_blob(
+        self, run_id: int, pos: int, value: Any, written: List[str]
+    ) -> Tuple[Any, ...]:
+        if not isinstance(value, np.ndarray) or value.dtype.hasobject:
+            return 'pickle', pickle.dumps(value, pickle.HIGHEST_PROTOCOL), None
+        elif value.nbytes > self.max_blob_bytes:
+            # Name by the position, keys might contain `/` or `..`.
+            path = os.path.join(str(run_id), f'{pos}.npy')
+            os.makedirs(os.path.join(self.array_dir, str(run_id)), exist_ok=True)
+            np.save(os.path.join(self.array_dir, path), value)
+            written.append(os.path.join(self.array_dir, path))
+            return 'npy', None, path
+        f = BytesIO()
+        np.save(f, value)
+        return 'npy', f.getvalue(), None
+
+    def find(self, *conds: Tuple[str, str, Any]) -> List[int]:
+        """Find run ids where all conditions `(key, op, value)` are True.
+
+        `op` is one of `<`, `<=`, `>`, `>=`, `==` and `!=`. Use `('loss', '==', nan)`
+        to find NaN fields and `('x', '==', None)` to find None fields. Other
+        comparisons with NaN or None fields are False except `!=`. `<`, `<=`, `>` and
+        `>=` only compare numbers with numbers and strings with strings. Integers
+        larger than 64 bits are pickled and can not be found.
+        """
+        sql, params = 'SELECT runs.id FROM runs', []
+        for i, (key, op, value) in enumerate(conds):
+            assert op in _OPS, f'`op` should be in {list(_OPS)}. Your: {op}.'
+            t, op = f'f{i}', _OPS[op]
+            value = value.item() if isinstance(value, np.generic) else value
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                assert op in ('=', '!='), '`op` of NaN or None should be `==` or `!=`.'
+                kind = 'NULL' if value is None else "'nan'"
+                cond = f'{t}.value IS NULL AND {t}.kind IS {kind}'
+                cond = f'NOT ({cond})' if op == '!=' else cond
+                params += [key]
+            elif op == '!=':
+                # NaN and None are stored as NULL, `!=` of NULL is never True.
+                cond = f'({t}.value != ? OR {t}.value IS NULL)'
+                params += [key, value]
+            elif op == '=':
+                cond = f'{t}.value = ?'
+                params += [key, value]
+            else:
+                # SQLite orders any text after any number, compare the same types.
+                types = "'text'" if isinstance(value, str) else "'integer', 'real'"
+                cond = f'{t}.value {op} ? AND typeof({t}.value) IN ({types})'
+                params += [key, value]
+            sql += (
+                f' JOIN fields {t} ON {t}.run_id = runs.id AND {t}.key = ? AND {cond}'
+            )
+        sql += ' ORDER BY runs.id'
+        return [r[0] for r in self.conn.execute(sql, params)]
+
+    def fields(self, run_id: int, keys: Sequence[str] | None = None) -> Dict[str, Any]:
+        """Get scalar fields of a run without loading its arrays."""
+        sql, params = 'SELECT key, value, kind FROM fields WHERE run_id = ?', [run_id]
+        if keys is not None:
+            sql += f' AND key IN ({", ".join("?" * len(keys))})'
+            params += list(keys)
+        rows = self.conn.execute(sql, params)
+        return {k: _from_field(v, kind) for k, v, kind in rows}
+
+    def load(self, run_id: int, mmap_mode: str | None = None) -> Any:
+        """Load a full record as `AttrDict`.
+
+        Args:
+            run_id: a run id from `add` or `find`.
+            mmap_mode: `mmap_mode` of `np.load` for arrays saved as files.
+        """
+        from nincore.attrdict import AttrDict
+
+        items = []
+        rows = self.conn.execute(
+            'SELECT pos, key, value, kind FROM fields WHERE run_id = ?', (run_id,)
+        )
+        for pos, key, value, kind in rows:
+            items.append((pos, key, _from_field(value, kind)))
+
+        rows = self.conn.execute(
+            'SELECT pos, key, kind, data, path FROM blobs WHERE run_id = ?', (run_id,)
+        )
+        for pos, key, kind, data, path in rows:
+            if kind == 'pickle':
+                value = pickle.loads(data)
+            elif path is not None:
+                value = np.load(os.path.join(self.array_dir, path), mmap_mode)
+            else:
+                value = np.load(BytesIO(data))
+            items.append((pos, key, value))
+        items.sort(key=lambda i: i[0])
+        flat = {key: value for _, key, value in items}
+        return AttrDict.unflatten(flat)
+
+
 try:
     import tomli
 
@@ -1,4 +1,7 @@
 import time
+from collections import deque
+
+__all__ = ['second_ddhhmmss', 'Stopwatch']
 
 
 def second_ddhhmmss(second: int | float) -> str:
@@ -16,6 +19,143 @@ def second_ddhhmmss(second: int | float) -> str:
     return runtime
 
 
+class Stopwatch:
+    """Stopwatch with laps, pause and resume, and a smoothed throughput and ETA.
+
+    `tick(n)` is cheap, it only counts items and recomputes `rate` and `eta` every
+    `every_n` ticks or `every_s` seconds. `rate` is smoothed with an EMA or with a
+    moving window of the last `window` updates if `window` is given.
+
+    Args:
+        total: total number of items for ETA.
+        alpha: EMA smoothing factor of `rate`, higher follows the latest rate faster.
+        window: if not None, use a moving window of updates instead of EMA.
+        every_n: recompute stats every `every_n` ticks.
+        every_s: recompute stats every `every_s` seconds.
+
+    Example:
+    >>> sw = Stopwatch(total=len(loader))
+    >>> for x in loader:
+    ...     train(x)
+    ...     if sw.tick(len(x)):
+    ...         print(sw)
+    """
+
+    def __init__(
+        self,
+        total: int | None = None,
+        alpha: float = 0.1,
+        window: int | None = None,
+        every_n: int = 100,
+        every_s: float = 1.0,
+    ) -> None:
+        assert 0.0 < alpha <= 1.0, f'`alpha` should be in (0, 1]. Your: {alpha}.'
+        assert window is None or window > 1, f'`window` should be > 1. Your: {window}.'
+        assert every_n > 0, f'`every_n` should be positive. Your: {every_n}.'
+        self.total = total
+        self.alpha = alpha
+        self.window = window
+        self.every_n = every_n
+        self.every_s = every_s
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset and start the stopwatch."""
+        self.count = 0
+        self.rate = 0.0
+        self.laps: list[float] = []
+        self._elapsed = 0.0
+        self._t0: float | None = time.perf_counter()
+        self._lap_t0 = 0.0
+        self._n = 0
+        self._last_t = self._t0
+        self._last_elapsed = 0.0
+        self._last_count = 0
+        self._samples: deque[tuple[float, int]] = deque(maxlen=self.window or 1)
+        self._samples.append((0.0, 0))
+
+    @property
+    def running(self) -> bool:
+        return self._t0 is not None
+
+    @property
+    def elapsed(self) -> float:
+        """Running time in seconds without paused time."""
+        if self._t0 is None:
+            return self._elapsed
+        return self._elapsed + time.perf_counter() - self._t0
+
+    def pause(self) -> None:
+        if self._t0 is not None:
+            self._elapsed += time.perf_counter() - self._t0
+            self._t0 = None
+
+    def resume(self) -> None:
+        if self._t0 is None:
+            self._t0 = time.perf_counter()
+            # Paused time should not count for `every_s`.
+            self._last_t = self._t0
+
+    def lap(self) -> float:
+        """Record a lap and return its time in seconds."""
+        elapsed = self.elapsed
+        diff = elapsed - self._lap_t0
+        self._lap_t0 = elapsed
+        self.laps.append(diff)
+        return diff
+
+    def tick(self, n: int = 1) -> bool:
+        """Count `n` items. Return True if stats are recomputed with this tick."""
+        self.count += n
+        self._n += 1
+        if self._n < self.every_n:
+            now = time.perf_counter()
+            if now - self._last_t < self.every_s:
+                return False
+        self.update()
+        return True
+
+    def update(self) -> None:
+        """Recompute `rate` from the items since the last update."""
+        elapsed = self.elapsed
+        self._n = 0
+        self._last_t = time.perf_counter()
+        diff = elapsed - self._last_elapsed
+        if diff <= 0.0:
+            return
+
+        if self.window is None:
+            rate = (self.count - self._last_count) / diff
+            if self.rate == 0.0:
+                self.rate = rate
+            else:
+                self.rate = self.alpha * rate + (1 - self.alpha) * self.rate
+        else:
+            self._samples.append((elapsed, self.count))
+            e0, c0 = self._samples[0]
+            self.rate = (self.count - c0) / (elapsed - e0)
+        self._last_elapsed = elapsed
+        self._last_count = self.count
+
+    @property
+    def eta(self) -> float | None:
+        """Remaining time in seconds or None if unknown."""
+        if self.total is None or self.rate <= 0.0:
+            return None
+        return max(self.total - self.count, 0) / self.rate
+
+    @property
+    def eta_str(self) -> str:
+        """Remaining time in dd:hh:mm:ss format."""
+        eta = self.eta
+        return '--:--:--:--' if eta is None else second_ddhhmmss(eta)
+
+    def __repr__(self) -> str:
+        total = '' if self.total is None else f'/{self.total}'
+        elapsed = second_ddhhmmss(self.elapsed)
+        return f'{self.count}{total} [{elapsed}<{self.eta_str}, {self.rate:,.2f} it/s]'
+
+
 if __name__ == '__main__':
     t0 = time.perf_counter()
     time.sleep(1)
@@ -1,19 +1,41 @@
 """Version related functions."""
 
+from functools import lru_cache
+from importlib import metadata
 from types import ModuleType
+from typing import Mapping
 
+from packaging.specifiers import SpecifierSet
 from packaging.version import Version, parse
 
 __all__ = [
+    'parse_ver',
     'parse_module_ver',
+    'parse_dist_ver',
     'is_newer_equal_ver',
     'is_newer_ver',
     'is_older_equal_ver',
     'is_older_ver',
     'is_same_ver',
+    'is_dist_ver',
+    'check_dist_vers',
+    'clear_ver_cache',
 ]
 
 
+@lru_cache(maxsize=None)
+def parse_ver(version: str) -> Version:
+    """Cached `packaging.version.parse`."""
+    return parse(version)
+
+
+@lru_cache(maxsize=None)
+def _cmp_ver(version0: str, version1: str) -> int:
+    """Return 1 if `version0` is newer, -1 if older and 0 if same as `version1`."""
+    v0, v1 = parse_ver(version0), parse_ver(version1)
+    return (v0 > v1) - (v0 < v1)
+
+
 def parse_module_ver(module: ModuleType) -> Version:
     """Parse version from given module.
 
@@ -23,10 +45,69 @@ def parse_module_ver(module: ModuleType) -> Version:
     1.12.1+cu113
     """
     version = getattr(module, '__version__')
-    version = parse(version)
+    version = parse_ver(version)
     return version
 
 
+@lru_cache(maxsize=None)
+def _packages_distributions() -> Mapping[str, list[str]]:
+    return metadata.packages_distributions()
+
+
+@lru_cache(maxsize=None)
+def parse_dist_ver(name: str) -> Version | None:
+    """Parse version of an installed distribution without importing it.
+
+    `name` is a distribution name, for example, `PyYAML`, or an import name, for
+    example, `yaml`. Return None if it is not installed.
+
+    Example:
+    >>> parse_dist_ver('torch')
+    1.12.1+cu113
+    """
+    try:
+        return parse_ver(metadata.version(name))
+    except metadata.PackageNotFoundError:
+        pass
+    # Slower path, find a distribution that provides an import name.
+    for dist in _packages_distributions().get(name, []):
+        try:
+            return parse_ver(metadata.version(dist))
+        except metadata.PackageNotFoundError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=None)
+def is_dist_ver(name: str, spec: str) -> bool:
+    """Return True if distribution `name` is installed and its version is in `spec`.
+
+    Example:
+    >>> is_dist_ver('torch', '>=1.12,<3')
+    True
+    """
+    version = parse_dist_ver(name)
+    if version is None:
+        return False
+    return SpecifierSet(spec).contains(version, prereleases=True)
+
+
+def check_dist_vers(table: Mapping[str, str]) -> dict[str, bool]:
+    """Check a table of distribution names and version specifiers at once.
+
+    Example:
+    >>> check_dist_vers({'torch': '>=1.12', 'numpy': '<2'})
+    {'torch': True, 'numpy': True}
+    """
+    return {name: is_dist_ver(name, spec) for name, spec in table.items()}
+
+
+def clear_ver_cache() -> None:
+    """Clear cached versions, for example, after installing packages in runtime."""
+    for fn in (parse_dist_ver, is_dist_ver, _packages_distributions):
+        fn.cache_clear()
+
+
 def is_newer_ver(module: ModuleType, version: str) -> bool:
     """Return True if `module.__version__` is newer than `version`.
 
@@ -35,9 +116,7 @@ def is_newer_ver(module: ModuleType, version: str) -> bool:
     >>> is_newer_ver(torch, '0.0.0')
     True
     """
-    module_version = parse_module_ver(module)
-    version = parse(version)
-    return module_version > version
+    return _cmp_ver(getattr(module, '__version__'), version) > 0
 
 
 def is_newer_equal_ver(module: ModuleType, version: str) -> bool:
@@ -48,30 +127,22 @@ def is_newer_equal_ver(module: ModuleType, version: str) -> bool:
     >>> is_newer_equal_ver(torch, '0.0.0')
     True
     """
-    module_version = parse_module_ver(module)
-    version = parse(version)
-    return module_version >= version
+    return _cmp_ver(getattr(module, '__version__'), version) >= 0
 
 
 def is_older_ver(module: ModuleType, version: str) -> bool:
     """Return True if `module.__version__` is newer or equal than `version`."""
-    module_version = parse_module_ver(module)
-    version = parse(version)
-    return module_version < version
+    return _cmp_ver(getattr(module, '__version__'), version) < 0
 
 
 def is_older_equal_ver(module: ModuleType, version: str) -> bool:
     """Return True if `module.__version__` is newer than `version`."""
-    module_version = parse_module_ver(module)
-    version = parse(version)
-    return module_version <= version
+    return _cmp_ver(getattr(module, '__version__'), version) <= 0
 
 
 def is_same_ver(module: ModuleType, version: str) -> bool:
     """Return True if `module.__version__` is newer than `version`."""
-    module_version = parse_module_ver(module)
-    version = parse(version)
-    return module_version == version
+    return _cmp_ver(getattr(module, '__version__'), version) == 0
 
 
 if __name__ == '__main__':
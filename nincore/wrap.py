@@ -1,52 +1,243 @@
+import atexit
 import cProfile
+import functools
+import inspect
+import itertools
+import logging
+import math
 import os
+import pickle
+import threading
 import time
+import types
 from pstats import SortKey, Stats
-from typing import Any, Callable
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Coroutine,
+    Generator,
+    Iterator,
+    NamedTuple,
+    Sequence,
+)
+
+import numpy as np
+
+from nincore.alg import split_n
+from nincore.io import save_trace_event
+
+if TYPE_CHECKING:
+    # Imported in functions, these are slow to import and rarely used.
+    from asyncio import Handle
+    from concurrent.futures import Future, ProcessPoolExecutor
+    from multiprocessing.shared_memory import SharedMemory
+
+logger = logging.getLogger(__name__)
 
 __all__ = [
     'wrap_time',
     'wrap_ident',
     'wrap_profile',
     'WrapIdent',
+    'WrapBlockingLoop',
+    'SpanTracer',
+    'pmap',
+    'get_pool',
+    'shutdown_pools',
 ]
 
 
-def wrap_time(fn: Callable[..., Any]) -> Callable[..., Any]:
-    """Wrapper and print the run time of `fn`."""
-    t0 = time.perf_counter()
+class _Ident:
+    """Hooks of `_wrap_calls` that do nothing."""
 
-    def wrapped(*args: Any, **kwargs: Any) -> Any:
-        return fn(*args, **kwargs)
+    # Hook a coroutine around each step instead of until it is finished.
+    stepwise = False
 
-    diff = time.perf_counter() - t0
-    print(f'Run `{fn=}` for {diff:,} seconds.')
-    return wrapped
+    def enter(self) -> None:
+        return
 
+    def leave(self) -> None:
+        return
 
-def wrap_ident(fn: Callable[..., Any]) -> Callable[..., Any]:
-    """Same as identity wrapper used for a placeholder."""
+    def finish(self) -> None:
+        return
 
-    def wrapped(*args: Any, **kwargs: Any) -> Any:
-        return fn(*args, **kwargs)
 
-    return wrapped
+class _Timer(_Ident):
+    """Accumulates the run time of `fn` between `enter` and `leave`."""
 
+    def __init__(self, fn: Callable[..., Any]) -> None:
+        self.fn = fn
+        self.diff = 0.0
+        self.t0 = 0.0
 
-def wrap_profile(fn: Callable[..., Any]) -> Callable[..., Any]:
-    def wrapped(*args: Any, **kwargs: Any) -> Any:
-        with cProfile.Profile() as p:
-            results = fn(*args, **kwargs)
-        stats = Stats(p)
+    def enter(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def leave(self) -> None:
+        self.diff += time.perf_counter() - self.t0
+
+    def finish(self) -> None:
+        fn = self.fn
+        print(f'Run `{fn=}` for {self.diff:,} seconds.')
+
+
+class _Profiler(_Ident):
+    """Profiles `fn` between `enter` and `leave`."""
+
+    # Only one profiler can be enabled at a time, disable it while awaiting.
+    stepwise = True
+
+    def __init__(self) -> None:
+        self.profile = cProfile.Profile()
+
+    def enter(self) -> None:
+        self.profile.enable()
+
+    def leave(self) -> None:
+        self.profile.disable()
+
+    def finish(self) -> None:
+        stats = Stats(self.profile)
         stats.sort_stats(SortKey.CUMULATIVE)
         stats.print_stats()
         profile_file = os.path.expanduser('./profile.pstat')
         stats.dump_stats(profile_file)
-        return results
+
+
+def _drive_gen(gen: Generator, hooks: _Ident) -> Generator:
+    """Forward `gen` and call `hooks.enter` and `hooks.leave` around each resume."""
+    send, value = gen.send, None
+    while True:
+        hooks.enter()
+        try:
+            item = send(value)
+        except StopIteration as e:
+            return e.value
+        finally:
+            hooks.leave()
+        try:
+            value = yield item
+            send = gen.send
+        except GeneratorExit:
+            gen.close()
+            raise
+        except BaseException as e:
+            send, value = gen.throw, e
+
+
+@types.coroutine
+def _drive_coro(coro: Coroutine, hooks: _Ident) -> Generator:
+    """Await `coro` and call `hooks.enter` and `hooks.leave` around each step."""
+    return (yield from _drive_gen(coro, hooks))
+
+
+def _wrap_calls(
+    fn: Callable[..., Any], new_hooks: Callable[[], _Ident]
+) -> Callable[..., Any]:
+    """Wrap `fn` with hooks that surround its real execution.
+
+    A coroutine function is hooked until its coroutine is finished, or only while
+    it is running if `hooks.stepwise`. A generator and an async generator function
+    are hooked only while they are running, time spent by the consumer between
+    items is not included.
+    """
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def wrapped(*args: Any, **kwargs: Any) -> Any:
+            hooks = new_hooks()
+            if hooks.stepwise:
+                try:
+                    return await _drive_coro(fn(*args, **kwargs), hooks)
+                finally:
+                    hooks.finish()
+            hooks.enter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                hooks.leave()
+                hooks.finish()
+
+    elif inspect.isasyncgenfunction(fn):
+
+        @functools.wraps(fn)
+        async def wrapped(*args: Any, **kwargs: Any) -> Any:
+            hooks = new_hooks()
+            agen = fn(*args, **kwargs)
+            send, value = agen.asend, None
+            try:
+                while True:
+                    hooks.enter()
+                    try:
+                        item = await send(value)
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        hooks.leave()
+                    try:
+                        value = yield item
+                        send = agen.asend
+                    except GeneratorExit:
+                        await agen.aclose()
+                        raise
+                    except BaseException as e:
+                        send, value = agen.athrow, e
+            finally:
+                hooks.finish()
+
+    elif inspect.isgeneratorfunction(fn):
+
+        @functools.wraps(fn)
+        def wrapped(*args: Any, **kwargs: Any) -> Any:
+            hooks = new_hooks()
+            try:
+                return (yield from _drive_gen(fn(*args, **kwargs), hooks))
+            finally:
+                hooks.finish()
+
+    else:
+
+        @functools.wraps(fn)
+        def wrapped(*args: Any, **kwargs: Any) -> Any:
+            hooks = new_hooks()
+            hooks.enter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hooks.leave()
+                hooks.finish()
 
     return wrapped
 
 
+def wrap_time(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrapper and print the run time of `fn` for each call.
+
+    Supports functions, coroutine functions, generator and async generator functions.
+    """
+    return _wrap_calls(fn, lambda: _Timer(fn))
+
+
+def wrap_ident(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Same as identity wrapper used for a placeholder.
+
+    Keeps `fn` as a coroutine, generator or async generator function if it is one.
+    """
+    return _wrap_calls(fn, _Ident)
+
+
+def wrap_profile(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrapper to profile `fn` with `cProfile` and dump stats to `./profile.pstat`.
+
+    Supports functions, coroutine functions, generator and async generator functions.
+    The profiler of a coroutine function is disabled while it awaits, so calls can
+    run concurrently in the same event loop.
+    """
+    return _wrap_calls(fn, _Profiler)
+
+
 class WrapIdent:
     def __enter__(self, *_: Any, **__: Any) -> None:
         return
@@ -55,6 +246,377 @@ class WrapIdent:
         return
 
 
+# Entered `WrapBlockingLoop`, `asyncio.Handle._run` is patched once while any is.
+_BLOCKING_LOOPS: list['WrapBlockingLoop'] = []
+_BLOCKING_LOCK = threading.Lock()
+_handle_run: Callable[['Handle'], None] | None = None
+
+
+def _timed_handle_run(handle: 'Handle') -> None:
+    t0 = time.perf_counter()
+    _handle_run(handle)
+    diff = time.perf_counter() - t0
+    for blocking in tuple(_BLOCKING_LOOPS):
+        if diff > blocking.threshold:
+            blocking.report(handle, diff)
+
+
+class WrapBlockingLoop:
+    """Report asyncio callbacks that block an event loop longer than `threshold`.
+
+    A blocking callback stalls every other task in the same event loop. This patches
+    the private `asyncio.Handle._run` while any `WrapBlockingLoop` is entered, so
+    callbacks of every loop in every thread are timed. Instances can be entered and
+    exited in any order, the original is restored after the last one exits.
+
+    Args:
+        threshold: a duration in seconds to report a callback.
+        report: a function called with the callback handle and its duration.
+            Default logs a warning.
+
+    Example:
+    >>> with WrapBlockingLoop(0.05):
+    ...     asyncio.run(main())
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        report: Callable[['Handle', float], None] | None = None,
+    ) -> None:
+        assert threshold >= 0.0, f'`threshold` should be >= 0. Your: {threshold}.'
+        self.threshold = threshold
+        self.report = report if report is not None else self._log
+
+    @staticmethod
+    def _log(handle: 'Handle', diff: float) -> None:
+        logger.warning(f'Event loop is blocked by `{handle}` for {diff:,} seconds.')
+
+    def __enter__(self) -> 'WrapBlockingLoop':
+        import asyncio
+
+        global _handle_run
+        with _BLOCKING_LOCK:
+            assert self not in _BLOCKING_LOOPS, '`WrapBlockingLoop` is already entered.'
+            if not _BLOCKING_LOOPS:
+                _handle_run = asyncio.Handle._run
+                asyncio.Handle._run = _timed_handle_run
+            _BLOCKING_LOOPS.append(self)
+        return self
+
+    def __exit__(self, *_: Any, **__: Any) -> None:
+        import asyncio
+
+        with _BLOCKING_LOCK:
+            _BLOCKING_LOOPS.remove(self)
+            if not _BLOCKING_LOOPS:
+                asyncio.Handle._run = _handle_run
+
+
+class _Span(_Ident):
+    """Records a complete event from `enter` to `leave`, also a context manager."""
+
+    def __init__(self, tracer: 'SpanTracer', name: str) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.t0 = 0
+
+    def enter(self) -> None:
+        self.t0 = time.perf_counter_ns()
+
+    def leave(self) -> None:
+        self.tracer._record(self.name, self.t0, time.perf_counter_ns())
+
+    def __enter__(self) -> None:
+        self.enter()
+
+    def __exit__(self, *_: Any, **__: Any) -> None:
+        self.leave()
+
+
+_NULL_SPAN = WrapIdent()
+_NULL_HOOKS = _Ident()
+
+
+class SpanTracer:
+    """Records nested spans as Chrome trace events into a preallocated ring buffer.
+
+    Each span is recorded as one complete event with its duration, thread and
+    process ids when it ends. When the buffer is full, the oldest spans are
+    overwritten, so there is no unmatched begin or end event. When disabled, `span` returns a shared
+    no-op context. Saved files can be opened with Perfetto or chrome://tracing.
+
+    Args:
+        capacity: maximum number of spans to keep.
+        enabled: if False, do not record any event until `enable`.
+
+    Example:
+    >>> tracer = SpanTracer()
+    >>> @tracer.wrap
+    ... def load():
+    ...     with tracer.span('decode'):
+    ...         ...
+    >>> load()
+    >>> tracer.save('./trace.json')
+    """
+
+    def __init__(self, capacity: int = 65_536, enabled: bool = True) -> None:
+        assert capacity > 0, f'`capacity` should be positive. Your: {capacity}.'
+        self.capacity = capacity
+        self.enabled = enabled
+        self.clear()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        # Each record is `(seq, t0, t1, name, tid, pid)`.
+        self._buf: list[tuple | None] = [None] * self.capacity
+        # `next` of `itertools.count` is atomic with GIL, no lock for each event.
+        self._seq = itertools.count()
+
+    def _record(self, name: str, t0: int, t1: int) -> None:
+        i = next(self._seq)
+        self._buf[i % self.capacity] = (
+            i,
+            t0,
+            t1,
+            name,
+            threading.get_native_id(),
+            os.getpid(),
+        )
+
+    def span(self, name: str) -> _Span | WrapIdent:
+        """A context manager to record a span `name`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def wrap(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrapper to record each call of `fn` as a span.
+
+        A generator is recorded as a span for each resume. A coroutine is recorded
+        from its start to its end, which might overlap with other tasks in the same
+        thread.
+        """
+        name = fn.__qualname__
+        return _wrap_calls(
+            fn, lambda: _Span(self, name) if self.enabled else _NULL_HOOKS
+        )
+
+    def events(self) -> list[dict[str, Any]]:
+        """Get recorded spans as Chrome `trace_event` complete events.
+
+        Sorted by start time, an outer span comes before its inner spans.
+        """
+        records = sorted(
+            (r for r in self._buf if r is not None), key=lambda r: (r[1], r[1] - r[2])
+        )
+        return [
+            {
+                'name': name,
+                'ph': 'X',
+                'ts': t0 / 1_000,
+                'dur': (t1 - t0) / 1_000,
+                'pid': pid,
+                'tid': tid,
+            }
+            for _, t0, t1, name, tid, pid in records
+        ]
+
+    def save(self, json_dir: str) -> None:
+        """Save recorded events as a Chrome `trace_event` json file."""
+        save_trace_event(self.events(), json_dir)
+
+
+# Process pools are costly to spawn, keep one per `num_workers` alive until exit.
+_POOLS: dict[int, 'ProcessPoolExecutor'] = {}
+
+
+def get_pool(num_workers: int | None = None) -> 'ProcessPoolExecutor':
+    """Get a reusable process pool with `num_workers` workers.
+
+    Example:
+    >>> pool = get_pool(4)
+    >>> pool is get_pool(4)
+    True
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    num_workers = num_workers or os.cpu_count() or 1
+    assert num_workers > 0, f'`num_workers` should be positive. Your: {num_workers}.'
+    pool = _POOLS.get(num_workers)
+    if pool is None:
+        pool = ProcessPoolExecutor(max_workers=num_workers)
+        _POOLS[num_workers] = pool
+    return pool
+
+
+def shutdown_pools() -> None:
+    """Shutdown all process pools created by `get_pool`."""
+    for pool in _POOLS.values():
+        pool.shutdown(wait=True, cancel_futures=True)
+    _POOLS.clear()
+
+
+atexit.register(shutdown_pools)
+
+
+class _SharedArray(NamedTuple):
+    """A handle to attach `np.ndarray` in `SharedMemory` from other processes."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def _to_shared(x: np.ndarray, shms: list['SharedMemory']) -> _SharedArray:
+    from multiprocessing.shared_memory import SharedMemory
+
+    # `SharedMemory` does not allow a zero size.
+    shm = SharedMemory(create=True, size=max(x.nbytes, 1))
+    shms.append(shm)
+    np.ndarray(x.shape, dtype=x.dtype, buffer=shm.buf)[...] = x
+    return _SharedArray(shm.name, x.shape, x.dtype.str)
+
+
+def _from_shared(x: Any, shms: list['SharedMemory']) -> Any:
+    from multiprocessing.shared_memory import SharedMemory
+
+    if not isinstance(x, _SharedArray):
+        return x
+    shm = SharedMemory(name=x.name)
+    shms.append(shm)
+    return np.ndarray(x.shape, dtype=x.dtype, buffer=shm.buf)
+
+
+def _run_chunk(
+    fn: Callable[..., Any],
+    x: Any,
+    idx: range | None,
+    args: tuple[Any, ...],
+    shms: list['SharedMemory'],
+) -> bytes:
+    x = _from_shared(x, shms)
+    if idx is not None:
+        x = x[idx.start : idx.stop]
+    args = tuple(_from_shared(a, shms) for a in args)
+    results = [fn(i, *args) for i in x]
+    # Pickle before returning, outputs might be views of `SharedMemory`.
+    return pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _pmap_worker(
+    fn: Callable[..., Any], x: Any, idx: range | None, args: tuple[Any, ...]
+) -> bytes:
+    shms: list['SharedMemory'] = []
+    try:
+        return _run_chunk(fn, x, idx, args, shms)
+    finally:
+        for shm in shms:
+            try:
+                shm.close()
+            except BufferError:
+                # An array still refers to the buffer, for example, via a traceback.
+                pass
+
+
+def _is_shareable(x: Any) -> bool:
+    return isinstance(x, np.ndarray) and not x.dtype.hasobject
+
+
+def pmap(
+    fn: Callable[..., Any],
+    x: Sequence[Any] | np.ndarray,
+    *args: Any,
+    chunk_size: int | None = None,
+    num_workers: int | None = None,
+    ordered: bool = True,
+) -> Iterator[Any]:
+    """Parallel map `fn(x[i], *args)` with a reusable process pool.
+
+    `x` is split into chunks with `split_n` and each chunk is run by a worker.
+    `np.ndarray` of `x` and `args` are copied once to `SharedMemory` and workers
+    attach to them instead of unpickling copies. Results are streamed back either
+    in the same order as `x` or in the order of finished chunks with
+    `ordered=False`. An exception from a worker is re-raised to the caller and
+    remaining chunks are cancelled.
+
+    Args:
+        fn: a picklable function, for example, defined at a module level.
+        x: a sequence or `np.ndarray` to map over its first dimension.
+        args: other arguments for every call of `fn`.
+        chunk_size: number of items per chunk. Default is 4 chunks per worker.
+        num_workers: number of processes. Default is `os.cpu_count()`.
+        ordered: if True, yield results in the same order as `x`.
+
+    Returns:
+        an iterator of `fn` outputs.
+
+    Example:
+    >>> list(pmap(np.sum, np.arange(6).reshape(3, 2), num_workers=2))
+    [1, 5, 9]
+    """
+    assert callable(fn), f'`fn` should be callable. Your: {type(fn)}.'
+    num_workers = num_workers or os.cpu_count() or 1
+    pool = get_pool(num_workers)
+    if chunk_size is None:
+        chunk_size = max(math.ceil(len(x) / (num_workers * 4)), 1)
+    assert chunk_size > 0, f'`chunk_size` should be positive. Your: {chunk_size}.'
+    return _pmap(pool, fn, x, args, chunk_size, ordered)
+
+
+def _pmap(
+    pool: 'ProcessPoolExecutor',
+    fn: Callable[..., Any],
+    x: Sequence[Any] | np.ndarray,
+    args: tuple[Any, ...],
+    chunk_size: int,
+    ordered: bool,
+) -> Iterator[Any]:
+    from concurrent.futures import FIRST_COMPLETED, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    shms: list['SharedMemory'] = []
+    futures: list['Future'] = []
+    try:
+        args = tuple(_to_shared(a, shms) if _is_shareable(a) else a for a in args)
+        if _is_shareable(x):
+            shared = _to_shared(x, shms)
+            for idx in split_n(range(len(x)), chunk_size):
+                futures.append(pool.submit(_pmap_worker, fn, shared, idx, args))
+        else:
+            for chunk in split_n(list(x), chunk_size):
+                futures.append(pool.submit(_pmap_worker, fn, chunk, None, args))
+
+        if ordered:
+            for future in futures:
+                yield from pickle.loads(future.result())
+        else:
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from pickle.loads(future.result())
+    except BrokenProcessPool:
+        # A worker died abruptly, the pool cannot be reused anymore.
+        for k, v in list(_POOLS.items()):
+            if v is pool:
+                del _POOLS[k]
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+        # Running chunks might still attach to `SharedMemory`, wait before unlink.
+        wait(futures)
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+
 if __name__ == '__main__':
 
     @wrap_profile
@@ -16,7 +16,7 @@ setup(
     license='Apache License 2.0',
     long_description=read('README.md'),
     long_description_content_type='text/markdown',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks*', 'tests*']),
     python_requires='>=3.6',
     classifier=[
         'License :: OSI Approved :: Apache Software License',
@@ -0,0 +1,259 @@
+import os
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from nincore import AttrDict, DefAttrDict, FrozenAttrDict
+
+
+def _config() -> AttrDict:
+    return AttrDict(
+        a=1,
+        b={'c': np.arange(6).reshape(2, 3), 'd': [1, {'e': 'f'}]},
+        g=None,
+    )
+
+
+class TestFingerprint:
+    def test_deterministic(self) -> None:
+        code = (
+            'import numpy as np; from nincore import AttrDict;'
+            "print(AttrDict(a=1, b={'c': np.arange(6).reshape(2, 3),"
+            " 'd': [1, {'e': 'f'}]}, g=None).fingerprint())"
+        )
+        out = subprocess.check_output([sys.executable, '-c', code], text=True)
+        assert out.strip() == _config().fingerprint()
+
+    def test_set(self) -> None:
+        code = (
+            'from nincore import AttrDict;'
+            "print(AttrDict(a={'x', 'y', 'z', 'w'}).fingerprint())"
+        )
+        fps = {
+            subprocess.check_output(
+                [sys.executable, '-c', code],
+                env={**os.environ, 'PYTHONHASHSEED': str(seed)},
+                text=True,
+            )
+            for seed in range(4)
+        }
+        assert len(fps) == 1
+        assert fps.pop().strip() == AttrDict(a=frozenset('wxyz')).fingerprint()
+        assert AttrDict(a={1}).fingerprint() != AttrDict(a=[1]).fingerprint()
+
+    def test_unsupported(self) -> None:
+        with pytest.raises(TypeError):
+            AttrDict(a=object()).fingerprint()
+
+    def test_content(self) -> None:
+        d = _config()
+        assert d.fingerprint() == DefAttrDict(d).fingerprint()
+        assert d.fingerprint() != AttrDict(a=1.0, b=d.b, g=None).fingerprint()
+
+        d2 = _config()
+        d2.b.c = d2.b.c.astype(np.float32)
+        assert d.fingerprint() != d2.fingerprint()
+        d2.b.c = d2.b.c.reshape(3, 2)
+        assert d.fingerprint() != d2.fingerprint()
+
+    def test_sort_keys(self) -> None:
+        d0, d1 = AttrDict(a=1, b=2), AttrDict(b=2, a=1)
+        assert d0.fingerprint() != d1.fingerprint()
+        assert d0.fingerprint(sort_keys=True) == d1.fingerprint(sort_keys=True)
+
+    def test_incremental(self) -> None:
+        d = _config()
+        fp = d.fingerprint()
+        d.b.d[1].e = 'g'
+        assert d.fingerprint() != fp
+        d.b.d[1].e = 'f'
+        assert d.fingerprint() == fp
+        d.b.pop('c')
+        assert d.fingerprint() != fp
+
+    def test_in_place(self) -> None:
+        d = AttrDict(a=[1, 2], w=np.zeros(3), b={'c': np.zeros(2)})
+        fp = d.fingerprint()
+        d.a.append(3)
+        assert d.fingerprint() != fp
+        fp = d.fingerprint()
+        d.w[0] = 5
+        assert d.fingerprint() != fp
+        fp = d.fingerprint()
+        d.b.c[1] = 5
+        assert d.fingerprint() != fp
+
+    def test_pickle(self) -> None:
+        d = _config()
+        fp = d.fingerprint()
+        d2 = pickle.loads(pickle.dumps(d))
+        assert '_fp_cache' not in d2.__dict__
+        assert d2.fingerprint() == fp
+
+
+class TestFrozenAttrDict:
+    def test_freeze_thaw(self) -> None:
+        d = _config()
+        f = d.freeze()
+        assert isinstance(f.b, FrozenAttrDict)
+        assert isinstance(f.b.d, tuple)
+        assert not f.b.c.flags.writeable
+        assert not np.shares_memory(f.b.c, d.b.c)
+        assert f.fingerprint() == d.fingerprint()
+        # Read-only arrays are shared without copying.
+        assert FrozenAttrDict(f).b.c is f.b.c
+
+        t = f.thaw()
+        assert t.fingerprint() == d.fingerprint()
+        assert isinstance(t.b, AttrDict)
+        t.b.c[0, 0] = 5
+        assert f.b.c[0, 0] == 0
+
+    def test_freeze_copy(self) -> None:
+        d = AttrDict(w=np.zeros(3))
+        f = d.freeze()
+        h = hash(f)
+        d.w[0] = 1
+        assert f.w[0] == 0
+        assert hash(f) == h == hash(FrozenAttrDict(w=np.zeros(3)))
+        # A read-only view of a writable buffer is copied.
+        view = d.w.view()
+        view.flags.writeable = False
+        assert not np.shares_memory(FrozenAttrDict(w=view).w, d.w)
+
+    def test_immutable(self) -> None:
+        f = _config().freeze()
+        with pytest.raises(TypeError):
+            f.a = 2
+        with pytest.raises(TypeError):
+            f['a'] = 2
+        with pytest.raises(AttributeError):
+            f.missing
+
+    def test_hash(self) -> None:
+        f0 = AttrDict(a=1, b={'c': 2}).freeze()
+        f1 = FrozenAttrDict(b={'c': 2}, a=1)
+        assert f0 == f1
+        assert {f0: 'x'}[f1] == 'x'
+        assert f0 != f0.with_updates(b__c=3)
+        assert f0 == {'a': 1, 'b': {'c': 2}}
+
+    def test_with_updates(self) -> None:
+        f = _config().freeze()
+        g = f.with_updates(b__d=(2,), h__i=1)
+        assert g.b.d == (2,)
+        assert g.h.i == 1
+        assert g.b.c is f.b.c
+        assert f.b.d[0] == 1
+        assert g.with_updates(b__d=(1, {'e': 'f'}), h={}).h == {}
+
+    def test_pickle(self) -> None:
+        f = _config().freeze()
+        assert pickle.loads(pickle.dumps(f)) == f
+
+
+class TestPath:
+    def test_get_set_path(self) -> None:
+        d = _config()
+        assert d.get_path('b.d.1.e') == 'f'
+        assert d.get_path('b.x', None) is None
+        with pytest.raises(KeyError):
+            d.get_path('b.x')
+        d.set_path('b.d.1.e', 'g')
+        d.set_path('h.i', {'j': 1})
+        assert d.b.d[1].e == 'g'
+        assert d.h.i.j == 1
+
+    def test_set_path_scalar(self) -> None:
+        d = AttrDict(a={'b': 5}, g=None)
+        with pytest.raises(TypeError):
+            d.set_path('a.b.c', 1)
+        assert d.a.b == 5
+        d.set_path('g.h', 1)
+        assert d.g.h == 1
+
+    def test_update_paths(self) -> None:
+        d = _config()
+        d.update_paths({'b.x.y': 1, 'b': {'z': 2}, 'b.x.w': 3, 'a': 4})
+        assert d.a == 4
+        assert d.b == {'z': 2, 'x': {'w': 3}}
+
+    def test_update_paths_list(self) -> None:
+        d = _config()
+        d.update_paths({'b.d.1.e': 'x', 'b.d.1': {'e': 'y'}, 'b.d.1.z': 2})
+        assert d.b.d[1] == {'e': 'y', 'z': 2}
+
+    def test_unflatten_replace(self) -> None:
+        d = AttrDict.unflatten({'a.b': 1, 'a': {'c': 2}, 'a.d': 3})
+        assert d.a == {'c': 2, 'd': 3}
+
+    def test_flatten(self) -> None:
+        d = AttrDict(a=1, b={'c': 2, 'd': {'e': [1, 2]}, 'f': {}})
+        flat = d.flatten()
+        assert flat == {'a': 1, 'b.c': 2, 'b.d.e': [1, 2], 'b.f': {}}
+        assert AttrDict.unflatten(flat) == d
+        assert isinstance(AttrDict.unflatten(flat).b.f, AttrDict)
+
+    def test_flatten_deep(self) -> None:
+        d = AttrDict.unflatten({'.'.join(['a'] * 5_000): 1})
+        assert d.flatten() == {'.'.join(['a'] * 5_000): 1}
+
+
+class TestDir:
+    def test_round_trip(self, tmp_path: os.PathLike) -> None:
+        dir_ = os.path.join(tmp_path, 'exp')
+        d = _config()
+        d.h = np.float32(0.5)
+        d.to_dir(dir_)
+        assert sorted(os.listdir(dir_)) == ['0.npy', 'meta.json']
+
+        d2 = AttrDict.from_dir(dir_)
+        assert isinstance(d2.b.c, np.memmap)
+        np.testing.assert_array_equal(d2.b.c, d.b.c)
+        assert list(d2.flatten()) == list(d.flatten())
+        assert d2.b.d == [1, {'e': 'f'}]
+        assert d2.h == 0.5
+
+    def test_update_dir_array(self, tmp_path: os.PathLike) -> None:
+        dir_ = os.path.join(tmp_path, 'exp')
+        _config().to_dir(dir_)
+        meta_mtime = os.path.getmtime(os.path.join(dir_, 'meta.json'))
+
+        old = AttrDict.from_dir(dir_)
+        AttrDict.update_dir_array(dir_, 'b.c', np.ones(3))
+        assert os.path.getmtime(os.path.join(dir_, 'meta.json')) == meta_mtime
+        AttrDict.update_dir_array(dir_, 'g', np.zeros(2))
+
+        d = AttrDict.from_dir(dir_)
+        np.testing.assert_array_equal(d.b.c, np.ones(3))
+        np.testing.assert_array_equal(d.g, np.zeros(2))
+        # Memory-mapped arrays of old files are still valid.
+        np.testing.assert_array_equal(old.b.c, np.arange(6).reshape(2, 3))
+
+    def test_update_dir_array_overlap(self, tmp_path: os.PathLike) -> None:
+        dir_ = os.path.join(tmp_path, 'exp')
+        _config().to_dir(dir_)
+        for key in ('b', 'b.c.x', 'a.x'):
+            with pytest.raises(ValueError):
+                AttrDict.update_dir_array(dir_, key, np.ones(2))
+        d = AttrDict.from_dir(dir_)
+        np.testing.assert_array_equal(d.b.c, np.arange(6).reshape(2, 3))
+        assert d.a == 1
+
+    def test_unsafe_key(self, tmp_path: os.PathLike) -> None:
+        dir_ = os.path.join(tmp_path, 'exp')
+        AttrDict({'a/b': np.ones(2)}).to_dir(dir_)
+        AttrDict.update_dir_array(dir_, '../c', np.zeros(2))
+        assert sorted(os.listdir(tmp_path)) == ['exp']
+        assert sorted(os.listdir(dir_)) == ['0.npy', '1.npy', 'meta.json']
+        np.testing.assert_array_equal(AttrDict.from_dir(dir_)['a/b'], np.ones(2))
+
+    def test_not_serializable(self, tmp_path: os.PathLike) -> None:
+        dir_ = os.path.join(tmp_path, 'exp')
+        for d in (AttrDict(l=[np.ones(2)]), AttrDict(s={1, 2})):
+            with pytest.raises(TypeError):
+                d.to_dir(dir_)
+        assert not os.path.exists(dir_)
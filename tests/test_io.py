@@ -0,0 +1,89 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from nincore import AttrDict
+from nincore.io import ResultStore
+
+
+def _record(i: int) -> AttrDict:
+    return AttrDict(
+        opt={'lr': 10.0**-i, 'amp': i % 2 == 0},
+        acc=i / 10,
+        name=f'run{i}',
+        layers=[i, i + 1],
+        pred=np.arange(i + 1, dtype=np.float32),
+    )
+
+
+class TestResultStore:
+    def test_find(self, tmp_path: os.PathLike) -> None:
+        with ResultStore(os.path.join(tmp_path, 'results.db')) as store:
+            ids = store.add_many(_record(i) for i in range(10))
+            assert len(store) == 10
+            found = store.find(('opt.lr', '<', 1e-3), ('acc', '>', 0.5))
+            assert found == ids[6:]
+            assert store.find(('name', '==', 'run3')) == [ids[3]]
+            assert store.fields(ids[2], ['acc', 'opt.amp']) == {
+                'acc': 0.2,
+                'opt.amp': True,
+            }
+
+    def test_load(self, tmp_path: os.PathLike) -> None:
+        db_dir = os.path.join(tmp_path, 'results.db')
+        with ResultStore(db_dir, max_blob_bytes=16) as store:
+            small, large = store.add_many([_record(1), _record(9)])
+
+        with ResultStore(db_dir) as store:
+            for run_id, i in ((small, 1), (large, 9)):
+                record = store.load(run_id)
+                expected = _record(i)
+                assert list(record.flatten()) == list(expected.flatten())
+                assert record.opt == expected.opt
+                assert record.layers == expected.layers
+                np.testing.assert_array_equal(record.pred, expected.pred)
+            assert isinstance(store.load(large, mmap_mode='r').pred, np.memmap)
+
+    def test_nan_inf(self, tmp_path: os.PathLike) -> None:
+        with ResultStore(os.path.join(tmp_path, 'results.db')) as store:
+            nan_id, inf_id, ok_id = store.add_many(
+                [{'loss': math.nan}, {'loss': math.inf}, {'loss': 0.1}]
+            )
+            assert math.isnan(store.load(nan_id).loss)
+            assert store.load(inf_id).loss == math.inf
+            assert store.find(('loss', '==', math.nan)) == [nan_id]
+            assert store.find(('loss', '!=', math.nan)) == [inf_id, ok_id]
+            assert store.find(('loss', '<', 1.0)) == [ok_id]
+            assert store.find(('loss', '!=', 0.1)) == [nan_id, inf_id]
+
+    def test_mixed_types(self, tmp_path: os.PathLike) -> None:
+        with ResultStore(os.path.join(tmp_path, 'results.db')) as store:
+            str_id, int_id, none_id, big_id = store.add_many(
+                [{'n': 'abc'}, {'n': 5}, {'n': None}, {'n': 1 << 64}]
+            )
+            assert store.find(('n', '>', 3)) == [int_id]
+            assert store.find(('n', '>', 'a')) == [str_id]
+            assert store.find(('n', '==', np.int64(5))) == [int_id]
+            assert store.find(('n', '==', None)) == [none_id]
+            assert store.find(('n', '!=', None)) == [str_id, int_id]
+            assert store.find(('n', '!=', 5)) == [str_id, none_id]
+            assert store.load(big_id).n == 1 << 64
+
+    def test_unsafe_key(self, tmp_path: os.PathLike) -> None:
+        db_dir = os.path.join(tmp_path, 'results.db')
+        with ResultStore(db_dir, max_blob_bytes=0) as store:
+            run_id = store.add({'a/b': np.ones(2), '/c': np.zeros(2)})
+            record = store.load(run_id)
+            np.testing.assert_array_equal(record['a/b'], np.ones(2))
+            np.testing.assert_array_equal(record['/c'], np.zeros(2))
+        assert sorted(os.listdir(tmp_path)) == ['results.db', 'results.db.arrays']
+
+    def test_rollback(self, tmp_path: os.PathLike) -> None:
+        with ResultStore(os.path.join(tmp_path, 'results.db'), 0) as store:
+            with pytest.raises(Exception):
+                store.add({'a': np.ones(2), 'b': lambda: None})
+            assert len(store) == 0
+            assert os.listdir(store.array_dir) == ['1']
+            assert os.listdir(os.path.join(store.array_dir, '1')) == []
@@ -0,0 +1,45 @@
+import time
+
+from nincore.time import Stopwatch, second_ddhhmmss
+
+
+def test_second_ddhhmmss() -> None:
+    assert second_ddhhmmss(86_400 * 1.5) == '01:12:00:00'
+
+
+class TestStopwatch:
+    def test_tick_every_n(self) -> None:
+        sw = Stopwatch(total=10, every_n=2, every_s=float('inf'))
+        assert not sw.tick()
+        assert sw.tick()
+        assert sw.count == 2
+        assert sw.rate > 0.0
+        assert sw.eta is not None
+
+    def test_pause_resume(self) -> None:
+        sw = Stopwatch()
+        sw.pause()
+        elapsed = sw.elapsed
+        time.sleep(0.02)
+        assert sw.elapsed == elapsed
+        sw.resume()
+        time.sleep(0.02)
+        assert sw.elapsed >= elapsed + 0.02
+
+    def test_laps(self) -> None:
+        sw = Stopwatch()
+        time.sleep(0.01)
+        sw.lap()
+        sw.lap()
+        assert len(sw.laps) == 2
+        assert sw.laps[0] >= 0.01
+        assert abs(sum(sw.laps) - sw.elapsed) < 0.01
+
+    def test_window(self) -> None:
+        sw = Stopwatch(total=100, window=3, every_n=1)
+        for _ in range(5):
+            time.sleep(0.001)
+            sw.tick(2)
+        assert sw.count == 10
+        assert 0.0 < sw.rate < 2_000
+        assert sw.eta_str != '--:--:--:--'
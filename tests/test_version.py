@@ -1,5 +1,13 @@
 import nincore
-from nincore.version import is_newer_ver, is_older_ver, is_same_ver, parse_module_ver
+from nincore.version import (
+    check_dist_vers,
+    is_newer_ver,
+    is_older_ver,
+    is_same_ver,
+    parse_dist_ver,
+    parse_module_ver,
+    parse_ver,
+)
 
 
 def test_parse_version() -> None:
@@ -16,3 +24,17 @@ class TestVersion:
 
     def test_version_equal(self) -> None:
         assert is_same_ver(nincore, nincore.__version__)
+
+
+class TestDistVersion:
+    def test_parse_dist_ver(self) -> None:
+        import yaml
+
+        assert parse_dist_ver('PyYAML') == parse_ver(yaml.__version__)
+        # An import name is also accepted.
+        assert parse_dist_ver('yaml') == parse_ver(yaml.__version__)
+        assert parse_dist_ver('not-installed-package') is None
+
+    def test_check_dist_vers(self) -> None:
+        r = check_dist_vers({'PyYAML': '>=0.0.0', 'not-installed-package': '>=0'})
+        assert r == {'PyYAML': True, 'not-installed-package': False}
@@ -0,0 +1,188 @@
+import asyncio
+import inspect
+import os
+import sys
+import time
+from typing import AsyncGenerator, Generator
+
+import numpy as np
+import pytest
+
+from nincore.io import load_json
+from nincore.wrap import (
+    SpanTracer,
+    WrapBlockingLoop,
+    pmap,
+    wrap_ident,
+    wrap_profile,
+    wrap_time,
+)
+
+
+def _add(x: int, y: int) -> int:
+    return x + y
+
+
+def _row_dot(x: np.ndarray, w: np.ndarray) -> float:
+    return float(x @ w)
+
+
+def _fail(x: int) -> int:
+    if x == 3:
+        raise ValueError('fail at 3')
+    return x
+
+
+class TestPmap:
+    def test_ordered(self) -> None:
+        r = list(pmap(_add, list(range(10)), 1, chunk_size=3, num_workers=2))
+        assert r == list(range(1, 11))
+
+    def test_unordered(self) -> None:
+        r = pmap(_add, list(range(10)), 1, chunk_size=3, num_workers=2, ordered=False)
+        assert sorted(r) == list(range(1, 11))
+
+    def test_shared_array(self) -> None:
+        x = np.arange(20, dtype=np.float32).reshape(10, 2)
+        w = np.array([1.0, 2.0], dtype=np.float32)
+        r = list(pmap(_row_dot, x, w, chunk_size=4, num_workers=2))
+        assert r == (x @ w).tolist()
+
+    def test_raise(self) -> None:
+        with pytest.raises(ValueError, match='fail at 3'):
+            list(pmap(_fail, list(range(10)), chunk_size=2, num_workers=2))
+
+
+class TestWrapKinds:
+    def test_coroutine(self, capsys: pytest.CaptureFixture) -> None:
+        @wrap_time
+        async def fn() -> int:
+            await asyncio.sleep(0.05)
+            return 1
+
+        assert inspect.iscoroutinefunction(fn)
+        assert asyncio.run(fn()) == 1
+        diff = float(capsys.readouterr().out.split(' for ')[-1].split()[0])
+        assert diff >= 0.05
+
+    def test_concurrent_profile(
+        self, tmp_path: os.PathLike, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.chdir(tmp_path)
+
+        @wrap_profile
+        async def fn(x: int) -> int:
+            await asyncio.sleep(0.02)
+            return x
+
+        async def main() -> tuple[list[int], object]:
+            calls = asyncio.gather(fn(1), fn(2))
+            # Both calls are awaiting, their profilers should be disabled.
+            await asyncio.sleep(0.01)
+            active = sys.getprofile()
+            return await calls, active
+
+        assert asyncio.run(main()) == ([1, 2], None)
+        assert os.path.isfile('profile.pstat')
+
+    def test_generator(self) -> None:
+        @wrap_ident
+        def fn() -> Generator[int, int, str]:
+            x = yield 1
+            yield x
+            return 'done'
+
+        assert inspect.isgeneratorfunction(fn)
+        gen = fn()
+        assert next(gen) == 1
+        assert gen.send(5) == 5
+        with pytest.raises(StopIteration) as e:
+            next(gen)
+        assert e.value.value == 'done'
+
+    def test_async_generator(self) -> None:
+        @wrap_time
+        async def fn() -> AsyncGenerator[int, None]:
+            for i in range(3):
+                await asyncio.sleep(0)
+                yield i
+
+        async def main() -> list[int]:
+            return [i async for i in fn()]
+
+        assert inspect.isasyncgenfunction(fn)
+        assert asyncio.run(main()) == [0, 1, 2]
+
+    def test_blocking_loop(self) -> None:
+        reported = []
+
+        async def main() -> None:
+            time.sleep(0.05)
+
+        with WrapBlockingLoop(0.01, lambda h, d: reported.append(d)):
+            asyncio.run(main())
+        assert reported and max(reported) >= 0.05
+
+    def test_blocking_loop_overlap(self) -> None:
+        run = asyncio.Handle._run
+        reported: dict[str, list[float]] = {'a': [], 'b': []}
+
+        async def main() -> None:
+            time.sleep(0.02)
+
+        a = WrapBlockingLoop(0.01, lambda h, d: reported['a'].append(d))
+        b = WrapBlockingLoop(0.01, lambda h, d: reported['b'].append(d))
+        a.__enter__()
+        b.__enter__()
+        a.__exit__()
+        asyncio.run(main())
+        assert not reported['a'] and reported['b']
+        b.__exit__()
+        assert asyncio.Handle._run is run
+
+
+class TestSpanTracer:
+    def test_nested(self, tmp_path: os.PathLike) -> None:
+        tracer = SpanTracer()
+
+        @tracer.wrap
+        def fn() -> None:
+            with tracer.span('inner'):
+                pass
+
+        fn()
+        events = tracer.events()
+        assert [(e['name'], e['ph']) for e in events] == [
+            (fn.__qualname__, 'X'),
+            ('inner', 'X'),
+        ]
+        outer, inner = events
+        assert outer['ts'] <= inner['ts']
+        assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+        assert all(e['pid'] == os.getpid() for e in events)
+
+        json_dir = os.path.join(tmp_path, 'trace.json')
+        tracer.save(json_dir)
+        assert load_json(json_dir)['traceEvents'] == events
+
+    def test_ring_buffer(self) -> None:
+        tracer = SpanTracer(capacity=3)
+
+        @tracer.wrap
+        def outer() -> None:
+            with tracer.span('in'):
+                pass
+
+        for _ in range(3):
+            outer()
+        # Whole spans are overwritten, no unmatched events are left.
+        events = tracer.events()
+        name = outer.__qualname__
+        assert [e['name'] for e in events] == [name, name, 'in']
+        assert all(e['ph'] == 'X' for e in events)
+
+    def test_disabled(self) -> None:
+        tracer = SpanTracer(enabled=False)
+        with tracer.span('a'):
+            pass
+        assert tracer.events() == []